@@ -1,9 +1,10 @@
 #! /usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
 import tkinter as tk
-from tkinter import simpledialog
-from typing import List, Optional
+from math import hypot
+from typing import List, Optional, Tuple
 
 
 class Color:
@@ -19,8 +20,14 @@ class Color:
         self.r = r
         self.g = g
         self.b = b
+        # Canonical form is formatted once; `draw` stringifies the color
+        # on every canvas call.
+        self._hex = f'#{r:02x}{g:02x}{b:02x}'
 
+    # Colors are never mutated after construction, so repeated fills with
+    # the same hex string become a cache lookup.
     @classmethod
+    @functools.lru_cache(maxsize=256)
     def from_hex(cls, hex_str: str) -> 'Color':
         try:
             if hex_str.startswith('#'):
@@ -42,7 +49,7 @@ class Color:
         return 0 <= value <= 255
 
     def __str__(self) -> str:
-        return f'#{self.r:02x}{self.g:02x}{self.b:02x}'
+        return self._hex
 
     def __repr__(self) -> str:
         return f'Color({self.r}, {self.g}, {self.b})'
@@ -62,9 +69,19 @@ class Shape:
         self.canvas: Optional[tk.Canvas] = canvas
         self.color: Optional[Color] = None
 
-    def draw(self) -> None:
+    def coords(self) -> Tuple[float, float, float, float]:
         raise NotImplementedError(
-            'The `draw` method must be implemented by subclasses.')
+            'The `coords` method must be implemented by subclasses.')
+
+    def fill(self) -> str:
+        return str(self.color) if self.color else Color.DEFAULT
+
+    def draw(self) -> None:
+        if self.canvas is None:
+            raise ValueError('The `canvas` property must be set.')
+
+        DRAW_DISPATCH[type(self)](
+            self.canvas, *self.coords(), fill=self.fill())
 
 
 class Rectangle(Shape):
@@ -74,12 +91,8 @@ class Rectangle(Shape):
         self.p2: Point = p2
         self.color: Optional[Color] = color
 
-    def draw(self) -> None:
-        if self.canvas is None:
-            raise ValueError('The `canvas` property must be set.')
-
-        self.canvas.create_rectangle(
-            self.p1.x, self.p1.y, self.p2.x, self.p2.y, fill=str(self.color if self.color else Color.default()))
+    def coords(self) -> Tuple[float, float, float, float]:
+        return self.p1.x, self.p1.y, self.p2.x, self.p2.y
 
 
 class Circle(Shape):
@@ -91,40 +104,82 @@ class Circle(Shape):
 
     @classmethod
     def with_two_points(cls, canvas: Optional[tk.Canvas], center: Point, side: Point, color: Optional[Color] = None) -> 'Circle':
-        radius: float = ((center.x - side.x)**2 + (center.y - side.y)**2)**0.5
+        radius: float = hypot(center.x - side.x, center.y - side.y)
         return cls(canvas, center, radius, color)
 
-    def draw(self) -> None:
-        if self.canvas is None:
-            raise ValueError('The `canvas` property must be set.')
+    def coords(self) -> Tuple[float, float, float, float]:
+        return (
+            self.center.x - self.radius, self.center.y - self.radius,
+            self.center.x + self.radius, self.center.y + self.radius,
+        )
+
 
-        x0: float = self.center.x - self.radius
-        y0: float = self.center.y - self.radius
-        x1: float = self.center.x + self.radius
-        y1: float = self.center.y + self.radius
-        self.canvas.create_oval(
-            x0, y0, x1, y1, fill=str(self.color if self.color else Color.default()))
+# Keyed by concrete type, so rendering many shapes is one dict lookup and
+# one unbound canvas call each, with no Python-level draw() dispatch.
+DRAW_DISPATCH = {
+    Rectangle: tk.Canvas.create_rectangle,
+    Circle: tk.Canvas.create_oval,
+}
 
 
-class NewShapeDialog(simpledialog.Dialog):
-    def body(self, master: tk.Tk) -> tk.Entry:
+class NewShapeDialog(tk.Toplevel):
+    # Built once and hidden between uses, so repeated "Add Shape" clicks
+    # only remap the existing window instead of constructing four labels,
+    # four entries and two buttons every time.
+    def __init__(self, master: tk.Tk):
+        super().__init__(master)
+        self.title('New Shape')
         self.result: Optional[Shape] = None
-        tk.Label(master, text="Shape (circle/rectangle):").grid(row=0, sticky=tk.W)
-        tk.Label(master, text="Color (#rrggbb):").grid(row=1, sticky=tk.W)
-        tk.Label(master, text="Point 1 (x, y):").grid(row=2, sticky=tk.W)
-        tk.Label(master, text="Point 2 (x, y):").grid(row=3, sticky=tk.W)
+        self._done: tk.BooleanVar = tk.BooleanVar(self)
 
-        self.shape_entry: tk.Entry = tk.Entry(master)
-        self.color_entry: tk.Entry = tk.Entry(master)
-        self.point1_entry: tk.Entry = tk.Entry(master)
-        self.point2_entry: tk.Entry = tk.Entry(master)
+        tk.Label(self, text="Shape (circle/rectangle):").grid(row=0, sticky=tk.W)
+        tk.Label(self, text="Color (#rrggbb):").grid(row=1, sticky=tk.W)
+        tk.Label(self, text="Point 1 (x, y):").grid(row=2, sticky=tk.W)
+        tk.Label(self, text="Point 2 (x, y):").grid(row=3, sticky=tk.W)
+
+        self.shape_entry: tk.Entry = tk.Entry(self)
+        self.color_entry: tk.Entry = tk.Entry(self)
+        self.point1_entry: tk.Entry = tk.Entry(self)
+        self.point2_entry: tk.Entry = tk.Entry(self)
 
         self.shape_entry.grid(row=0, column=1)
         self.color_entry.grid(row=1, column=1)
         self.point1_entry.grid(row=2, column=1)
         self.point2_entry.grid(row=3, column=1)
 
-        return self.shape_entry
+        button_frame: tk.Frame = tk.Frame(self)
+        button_frame.grid(row=4, column=0, columnspan=2)
+        tk.Button(button_frame, text='OK', width=10, command=self.ok) \
+            .pack(side=tk.LEFT, padx=5, pady=5)
+        tk.Button(button_frame, text='Cancel', width=10, command=self.cancel) \
+            .pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.protocol('WM_DELETE_WINDOW', self.cancel)
+        self.withdraw()
+
+    def show(self) -> Optional[Shape]:
+        self.result = None
+        for entry in (self.shape_entry, self.color_entry,
+                      self.point1_entry, self.point2_entry):
+            entry.delete(0, tk.END)
+        self.deiconify()
+        self.grab_set()
+        self.shape_entry.focus_set()
+        self.wait_variable(self._done)
+        return self.result
+
+    def ok(self) -> None:
+        self.apply()
+        self.close()
+
+    def cancel(self) -> None:
+        self.result = None
+        self.close()
+
+    def close(self) -> None:
+        self.grab_release()
+        self.withdraw()
+        self._done.set(True)
 
     def apply(self) -> None:
         shape = self.shape_entry.get()
@@ -155,6 +210,7 @@ class Display:
         self.canvas: tk.Canvas = tk.Canvas(self.root, width=600, height=600)
         self.canvas.pack()
         self.shapes: List[Shape] = []
+        self.new_shape_dialog: NewShapeDialog = NewShapeDialog(self.root)
 
         self.add_controls()
 
@@ -162,13 +218,22 @@ class Display:
         self.shapes.append(shape)
         shape.draw()
 
+    def add_shapes(self, shapes: List[Shape]) -> None:
+        # Bulk insertion draws every shape first and lets Tk flush the
+        # pending redraws once at the end, instead of once per shape.
+        self.shapes.extend(shapes)
+        canvas: tk.Canvas = self.canvas
+        for shape in shapes:
+            DRAW_DISPATCH[type(shape)](
+                canvas, *shape.coords(), fill=shape.fill())
+        self.canvas.update_idletasks()
+
     def clear_all_shapes(self) -> None:
         self.shapes.clear()
         self.canvas.delete("all")
 
     def prompt_for_shape(self) -> None:
-        dialog: NewShapeDialog = NewShapeDialog(self.root)
-        shape: Optional[Shape] = dialog.result
+        shape: Optional[Shape] = self.new_shape_dialog.show()
 
         if shape:
             shape.canvas = self.canvas
@@ -197,8 +262,7 @@ def main() -> None:
                             Point(250, 200), Color.from_hex('#8866ff'))
     circ: Shape = Circle(display.canvas, Point(300, 300),
                          50, Color.from_hex('#ff6688'))
-    display.add_shape(rect)
-    display.add_shape(circ)
+    display.add_shapes([rect, circ])
 
     root.mainloop()
 
@@ -4,23 +4,35 @@
 
 import json
 import os
+import re
 from tkinter.scrolledtext import ScrolledText
 from tkinter.filedialog import asksaveasfilename
 from tkinter import ttk
-from typing import Dict, List, Literal, Optional, Tuple, Union
+from typing import List, Literal, Optional, Tuple
 
 import aiohttp
 import asyncio
 import pyperclip # type: ignore
+import threading
 import tkinter as tk
-import xml.dom.minidom
+import xml.etree.ElementTree as ET
+
+from lxml import etree
+
+
+_BLANK_LINE_RE = re.compile(r'^[ \t]*\n', re.MULTILINE)
 
 
 def unify_crlf(s: str) -> str:
-    return os.linesep.join([s for s in s.splitlines() if s.strip()])
+    # One C-level regex pass drops blank lines instead of allocating a
+    # stripped copy of every line just to test it.
+    s = _BLANK_LINE_RE.sub('', s.replace('\r\n', '\n')).rstrip('\n')
+    return s.replace('\n', os.linesep)
 
 
 class WeatherDataEntry:
+    __slots__ = ('year', 'temperature', 'temperature_smoothed')
+
     def __init__(
         self, year: int, temperature: float, temperature_smoothed: float
     ) -> None:
@@ -70,10 +82,14 @@ class WeatherData:
 
             return cls(lower_, upper_, order_)
 
-        def to_dict(self) -> Dict[str, Union[int, str]]:
-            return {
-                'lower': self.lower, 'upper': self.upper, 'order': self.order
-            } if self.order else {'lower': self.lower, 'upper': self.upper}
+        def to_query(self) -> str:
+            # The values are validated ints / fixed keywords, so the query
+            # string can be emitted directly without a dict + urlencode
+            # round-trip.
+            query: str = f'?lower={self.lower}&upper={self.upper}'
+            if self.order:
+                query += f'&order={self.order}'
+            return query
 
     def __init__(self, data: Optional[List[WeatherDataEntry]] = None) -> None:
         self.data: List[WeatherDataEntry] = data if data else []
@@ -110,18 +126,14 @@ class WeatherData:
 
     @classmethod
     def from_xml(cls, xml_obj: str) -> 'WeatherData':
+        # ElementTree parses in C and iterating direct children avoids the
+        # repeated subtree scans minidom's getElementsByTagName would do.
         ret: 'WeatherData' = cls()
-        for entry in xml.dom.minidom.parseString(xml_obj) \
-                .getElementsByTagName('entry'):
+        for entry in ET.fromstring(xml_obj).iterfind('entry'):
             ret.append(WeatherDataEntry.try_from(
-                # autopep8: off
-                entry.getElementsByTagName('year')[0] \
-                    .firstChild.data, # type: ignore
-                entry.getElementsByTagName('temperature')[0] \
-                    .firstChild.data, # type: ignore
-                entry.getElementsByTagName('temperature_smoothed')[0] \
-                    .firstChild.data, # type: ignore
-                # autopep8: on
+                entry.findtext('year', ''),
+                entry.findtext('temperature', ''),
+                entry.findtext('temperature_smoothed', ''),
             ))
         return ret
 
@@ -135,49 +147,78 @@ class QueryType:
         self.type = type
 
 
+async def make_session() -> aiohttp.ClientSession:
+    # The session must be created on the loop it will be used with.
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60)
+    )
+
+
 async def fetch_data(
-    server: str, query_type: QueryType, params: WeatherData.Params
+    session: aiohttp.ClientSession, server: str, query_type: QueryType,
+    params: WeatherData.Params
 ) -> Tuple[str, str]:
-    url = server + query_type.type
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params.to_dict()) as response:
-            if response.status != 200:
-                raise Exception(
-                    'Failed to fetch data from '
-                    f'{url} {response.status} {response.reason}'
-                )
+    url = server + query_type.type + params.to_query()
 
-            raw: Optional[str] = None
-            pretty: Optional[str] = None
-            decoded: Optional[WeatherData] = None
-
-            if query_type.type == '/json':
-                raw = await response.text()
-                pretty = json.dumps(json.loads(raw), indent=2)
-                decoded = WeatherData.from_json(raw)
-            elif query_type.type == '/csv':
-                raw = await response.text()
-                pretty = unify_crlf(raw)
-                decoded = WeatherData.from_csv(raw)
-            elif query_type.type == '/xml':
-                raw = await response.text()
-                pretty = unify_crlf(
-                    xml.dom.minidom.parseString(raw).toprettyxml(indent='  ')
-                )
-                decoded = WeatherData.from_xml(raw)
-            else:
-                raise Exception(f'Failed to fetch data from {url}')
+    async with session.get(url) as response:
+        if response.status != 200:
+            raise Exception(
+                'Failed to fetch data from '
+                f'{url} {response.status} {response.reason}'
+            )
+
+        raw: Optional[str] = None
+        pretty: Optional[str] = None
+        decoded: Optional[WeatherData] = None
+
+        if query_type.type == '/json':
+            raw = await response.text()
+            pretty = json.dumps(json.loads(raw), indent=2)
+            decoded = WeatherData.from_json(raw)
+        elif query_type.type == '/csv':
+            raw = await response.text()
+            pretty = unify_crlf(raw)
+            decoded = WeatherData.from_csv(raw)
+        elif query_type.type == '/xml':
+            raw = await response.text()
+            # lxml parses and pretty-prints in libxml2; its output has
+            # no blank lines, so the unify_crlf pass is unnecessary.
+            pretty = etree.tostring(
+                etree.fromstring(raw.encode()),
+                pretty_print=True, encoding='unicode'
+            )
+            decoded = WeatherData.from_xml(raw)
+        else:
+            raise Exception(f'Failed to fetch data from {url}')
 
-            return pretty, str(decoded)
+        return pretty, str(decoded)
 
 
 class App(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
         self.title('Simple Weather Data Client')
+        # One loop and one session for the whole App lifetime: connector,
+        # DNS cache and cookie jar are built once, and keep-alive reuses
+        # the TCP connection across queries. The loop runs forever on a
+        # daemon thread so it is never set up or torn down per query.
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self._session = asyncio.run_coroutine_threadsafe(
+            make_session(), self._loop
+        ).result()
         self.create_widgets()
 
+    def destroy(self) -> None:
+        # Close the session and stop the loop before tearing the window
+        # down, so exits do not leave aiohttp complaining about an
+        # unclosed session/connector on stderr.
+        asyncio.run_coroutine_threadsafe(
+            self._session.close(), self._loop
+        ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        super().destroy()
+
     def create_widgets(self) -> None:
         # 服务器地址输入框
         self.label_request_type = tk.Label(self, text='服务器：')
@@ -185,8 +226,8 @@ class App(tk.Tk):
             row=0, column=1, padx=0, pady=10, sticky='E'
         )
 
-        self.url_entry = tk.Entry(self, width=30)
-        self.url_entry.insert(0, 'http://127.0.0.1:555')
+        self.url_var = tk.StringVar(value='http://127.0.0.1:555')
+        self.url_entry = tk.Entry(self, textvariable=self.url_var, width=30)
         self.url_entry.grid(
             row=0, column=2, columnspan=4, padx=0, pady=10, sticky='EW'
         )
@@ -203,8 +244,10 @@ class App(tk.Tk):
             row=1, column=0, padx=0, pady=0, sticky='E'
         )
 
+        self.request_type_var = tk.StringVar()
         self.request_type_combobox = ttk.Combobox(
-            self, width=7, state='readonly'
+            self, textvariable=self.request_type_var, width=7,
+            state='readonly'
         )
         self.request_type_combobox['values'] = QueryType.VALUES
         self.request_type_combobox.current(0)
@@ -216,7 +259,10 @@ class App(tk.Tk):
         self.label_order = tk.Label(self, text='排序方式：')
         self.label_order.grid(row=1, column=2, padx=0, pady=0, sticky='E')
 
-        self.order_combobox = ttk.Combobox(self, width=7, state='readonly')
+        self.order_var = tk.StringVar()
+        self.order_combobox = ttk.Combobox(
+            self, textvariable=self.order_var, width=7, state='readonly'
+        )
         self.order_combobox['values'] = ['年份顺序', '温度升序', '温度降序']
         self.order_combobox.current(0)
         self.order_combobox.grid(row=1, column=3, padx=0, pady=0, sticky='W')
@@ -227,16 +273,20 @@ class App(tk.Tk):
             row=1, column=4, padx=0, pady=0, sticky='E'
         )
 
-        self.lower_entry = tk.Entry(self, width=7)
-        self.lower_entry.insert(0, '1900')
+        self.lower_var = tk.StringVar(value='1900')
+        self.lower_entry = tk.Entry(
+            self, textvariable=self.lower_var, width=7
+        )
         self.lower_entry.grid(row=1, column=5, padx=0, pady=0, sticky='W')
 
         # 结束年份
         self.label_upper = tk.Label(self, text='结束年份：')
         self.label_upper.grid(row=1, column=6, padx=0, pady=0, sticky='E')
 
-        self.upper_entry = tk.Entry(self, width=7)
-        self.upper_entry.insert(0, '2020')
+        self.upper_var = tk.StringVar(value='2020')
+        self.upper_entry = tk.Entry(
+            self, textvariable=self.upper_var, width=7
+        )
         self.upper_entry.grid(row=1, column=7, padx=0, pady=0, sticky='W')
 
         # 原始数据显示区域
@@ -303,16 +353,19 @@ class App(tk.Tk):
         text: Optional[str] = None
 
         try:
-            server_url: str = self.url_entry.get().rstrip('/')
-            query_type: QueryType = QueryType(self.request_type_combobox.get())
+            server_url: str = self.url_var.get().rstrip('/')
+            query_type: QueryType = QueryType(self.request_type_var.get())
             params = WeatherData.Params.try_from(
-                self.lower_entry.get(),
-                self.upper_entry.get(),
+                self.lower_var.get(),
+                self.upper_var.get(),
                 {'年份顺序': '', '温度升序': 'asc', '温度降序': 'desc'}.get(
-                    self.order_combobox.get(), ''
+                    self.order_var.get(), ''
                 )
             )
-            raw, text = asyncio.run(fetch_data(server_url, query_type, params))
+            raw, text = asyncio.run_coroutine_threadsafe(
+                fetch_data(self._session, server_url, query_type, params),
+                self._loop,
+            ).result()
         except Exception as e:
             raw = f'Failed to fetch data: {e}'
             text = ''
@@ -328,7 +381,7 @@ class App(tk.Tk):
         self.result_text.config(state='disabled')
 
     def save_raw(self) -> None:
-        query_type: QueryType = QueryType(self.request_type_combobox.get())
+        query_type: QueryType = QueryType(self.request_type_var.get())
         default_extension: str = {
             '/json': '.json', '/csv': '.csv', '/xml': '.xml'
         }.get(query_type.type, 'txt')
